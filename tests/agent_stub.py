@@ -0,0 +1,115 @@
+"""A local stand-in for the Lyzr inference API, served on an ephemeral port.
+
+Calls answer {"response": "stub: <message>"} after `delay` seconds unless a
+response was queued with `respond()`, `respond_stream()` or `hang()`. The stub records every request, the
+client ports it was reached from (one per pooled connection) and the most
+calls it had in flight at once.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class AgentStub:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.planned = []
+        self.requests = []
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.released = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v3/inference/chat/"
+
+    def respond(self, status: int, body: dict = None, headers: dict = None) -> None:
+        """Answer the next call with `status`, `body` and `headers`"""
+        with self.lock:
+            self.planned.append(("json", status, body if body is not None else {}, headers or {}))
+
+    def respond_stream(self, events: list, event_delay: float = 0.0) -> None:
+        """Answer the next call with server-sent events, one every `event_delay` seconds.
+
+        The events are sent as given; include "[DONE]" to end the answer the
+        way the agent does.
+        """
+        with self.lock:
+            self.planned.append(("sse", events, event_delay))
+
+    def hang(self) -> None:
+        """Never answer the next call; the connection is dropped when the stub closes"""
+        with self.lock:
+            self.planned.append(("hang",))
+
+    def close(self) -> None:
+        self.released.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append((self.path, body))
+                    stub.connections.add(self.client_address[1])
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    planned = stub.planned.pop(0) if stub.planned else None
+                try:
+                    time.sleep(stub.delay)
+                    if planned is None and "/stream/" in self.path:
+                        planned = ("sse", [f"stub: {body['message']}", "[DONE]"], 0.0)
+                    elif planned is None:
+                        planned = ("json", 200, {"response": f"stub: {body['message']}"}, {})
+                    if planned[0] == "hang":
+                        stub.released.wait()
+                        self.close_connection = True
+                    elif planned[0] == "sse":
+                        self.send_events(*planned[1:])
+                    else:
+                        self.send_json(*planned[1:])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client went away
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def send_json(self, status: int, body: dict, headers: dict):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_events(self, events: list, event_delay: float):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for event in events:
+                    time.sleep(event_delay)
+                    lines = "".join(f"data: {line}\n" for line in event.split("\n"))
+                    self.wfile.write(f"{lines}\n".encode("utf-8"))
+                    self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+from agent_stub import AgentStub
+
+# index.py connects at import time, so point it at a throwaway SQLite file first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def agent_stub():
+    stub = AgentStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def agent(agent_stub, monkeypatch):
+    """A fresh AgentClient pointed at the stub and installed as the app's client; retries back off for milliseconds"""
+    import index
+
+    client = index.AgentClient(
+        agent_stub.url, agent_stub.url.replace("/chat/", "/stream/"), "test-key", 4,
+        httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=30),
+        False, index.CircuitBreaker(3, 60), 2, 0.01, 0.05
+    )
+    monkeypatch.setattr(index, "agent_client", client)
+    return client
+
+
+@pytest.fixture
+def crm_upload():
+    """A CRM upload, which chat-generated reports take their month and year from"""
+    import index
+
+    db = index.SessionLocal()
+    try:
+        upload = index.MonthlyUpload(upload_type="CRM", file_name="test", name="test", month="September", year="2024")
+        db.add(upload)
+        db.commit()
+        return upload.upload_id
+    finally:
+        db.close()
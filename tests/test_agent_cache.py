@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import index
+
+REPORT = [{"親コード": "P", "顧客名": "c", "案件名": "n", "案件ランク": "A", "案件コード": "0000001", "純売上額": 1.0}]
+
+
+@pytest.fixture
+def failing_cache_writes(monkeypatch):
+    def prune_cache_table(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(index, "prune_cache_table", prune_cache_table)
+    index.agent_response_cache.entries.clear()
+
+
+async def wait_for_comparison(client, comparison_id):
+    for _ in range(200):
+        comparison = (await client.get(f"/api/comparison/{comparison_id}")).json()
+        if comparison["status"] != "pending":
+            # The job may still be writing the response cache on a DB thread
+            await asyncio.gather(*index.comparison_tasks)
+            return comparison
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"comparison {comparison_id} stayed pending")
+
+
+def test_failed_cache_write_keeps_the_comparison_a_success(agent, agent_stub, failing_cache_writes):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            submitted = (await client.post("/api/compare_reports", json={
+                "old_report": REPORT, "new_report": REPORT, "query": "what changed?", "bypass_cache": True
+            })).json()
+            comparison = await wait_for_comparison(client, submitted["comparison_id"])
+        await agent.aclose()
+        return comparison
+
+    failures = index.agent_response_cache.store_failures
+    comparison = asyncio.run(scenario())
+    assert comparison["status"] == "success", comparison["error"]
+    assert comparison["result"].startswith("stub: ")
+    assert index.agent_response_cache.store_failures == failures + 1
+
+
+def test_failed_cache_write_keeps_the_saved_chat_report(agent, agent_stub, crm_upload, failing_cache_writes):
+    agent_stub.respond(200, {"response": "```json\n" + json.dumps(REPORT, ensure_ascii=False) + "\n```"})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            response = await client.post("/api/chat", json={"message": "report please", "bypass_cache": True})
+        await agent.aclose()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200, response.text
+    assert response.json()["report_data"] == REPORT
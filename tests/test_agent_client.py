@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import index
+
+REPORT = [{"親コード": "P", "顧客名": "c", "案件名": "n", "案件ランク": "A", "案件コード": "0000001", "純売上額": 1.0}]
+
+
+def payload(message):
+    return {"user_id": "u", "agent_id": "a", "session_id": "s", "message": message}
+
+
+def report_answer():
+    return {"response": "```json\n" + json.dumps(REPORT, ensure_ascii=False) + "\n```"}
+
+
+def run(agent, calls):
+    """Await the calls on a fresh event loop, closing the agent's HTTP client afterwards"""
+    async def scenario():
+        try:
+            return await asyncio.gather(*calls())
+        finally:
+            await agent.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_sequential_calls_reuse_one_pooled_connection(agent, agent_stub):
+    async def one_after_another():
+        return [await agent.post(payload(f"call {i}"), timeout=5, deadline=10) for i in range(5)]
+
+    responses, = run(agent, lambda: [one_after_another()])
+    assert [response.json()["response"] for response in responses] == [f"stub: call {i}" for i in range(5)]
+    assert len(agent_stub.connections) == 1
+
+
+def test_calls_in_flight_are_capped(agent, agent_stub):
+    agent_stub.delay = 0.1
+    responses = run(agent, lambda: [agent.post(payload(f"call {i}"), timeout=5, deadline=10) for i in range(12)])
+
+    assert all(response.status_code == 200 for response in responses)
+    assert agent_stub.max_in_flight == agent.max_concurrent == 4
+    assert len(agent_stub.connections) <= 4
+    assert agent.stats()["in_flight"] == 0 and agent.stats()["calls"] == 12
+
+
+def test_lifespan_starts_and_closes_the_client(agent, agent_stub, crm_upload):
+    agent_stub.respond(200, report_answer())
+    with TestClient(index.app) as client:
+        assert agent.client is not None
+        response = client.post("/api/chat", json={"message": "report please", "bypass_cache": True})
+        assert response.status_code == 200, response.text
+        assert response.json()["report_data"] == REPORT
+    assert agent.client is None
+    assert [body["message"] for _, body in agent_stub.requests] == ["report please"]
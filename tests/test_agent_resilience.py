@@ -0,0 +1,252 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+import index
+
+REPORT = [{"親コード": "P", "顧客名": "c", "案件名": "n", "案件ランク": "A", "案件コード": "0000001", "純売上額": 1.0}]
+
+
+def payload(message):
+    return {"user_id": "u", "agent_id": "a", "session_id": "s", "message": message}
+
+
+def make_agent(agent_stub, monkeypatch, max_concurrent=4, retry_max_delay=0.05):
+    """Like the `agent` fixture, with the knobs these tests turn"""
+    client = index.AgentClient(
+        agent_stub.url, agent_stub.url.replace("/chat/", "/stream/"), "test-key", max_concurrent,
+        httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=30),
+        False, index.CircuitBreaker(3, 60), 2, 0.01, retry_max_delay
+    )
+    monkeypatch.setattr(index, "agent_client", client)
+    return client
+
+
+def run(agent, scenario):
+    """Run `scenario()` on a fresh event loop, closing the agent's HTTP client afterwards"""
+    async def wrapped():
+        try:
+            return await scenario()
+        finally:
+            await agent.aclose()
+
+    return asyncio.run(wrapped())
+
+
+async def wait_for_comparison(client, comparison_id):
+    for _ in range(200):
+        comparison = (await client.get(f"/api/comparison/{comparison_id}")).json()
+        if comparison["status"] != "pending":
+            # The job may still be writing the response cache on a DB thread
+            await asyncio.gather(*index.comparison_tasks)
+            return comparison
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"comparison {comparison_id} stayed pending")
+
+
+def compare(agent):
+    """Submit a comparison through the app and wait for it to leave "pending\""""
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            submitted = (await client.post("/api/compare_reports", json={
+                "old_report": REPORT, "new_report": REPORT, "query": "what changed?", "bypass_cache": True
+            })).json()
+            return await wait_for_comparison(client, submitted["comparison_id"])
+
+    return run(agent, scenario)
+
+
+def test_transient_failures_are_retried(agent, agent_stub):
+    agent_stub.respond(503)
+    agent_stub.respond(502)
+    response = run(agent, lambda: agent.post(payload("hi"), timeout=5, deadline=10))
+
+    assert response.status_code == 200
+    assert response.json()["response"] == "stub: hi"
+    assert agent.retries == 2 and len(agent_stub.requests) == 3
+    assert agent.breaker.consecutive_failures == 0
+
+
+def test_last_failure_is_returned_when_retries_run_out(agent, agent_stub):
+    for _ in range(3):
+        agent_stub.respond(500, {"detail": "boom"})
+    response = run(agent, lambda: agent.post(payload("hi"), timeout=5, deadline=10))
+
+    assert response.status_code == 500
+    assert len(agent_stub.requests) == agent.max_retries + 1
+
+
+def test_retry_after_is_honoured(agent_stub, monkeypatch):
+    agent = make_agent(agent_stub, monkeypatch, retry_max_delay=5)
+    agent_stub.respond(429, {"detail": "slow down"}, {"Retry-After": "1"})
+
+    started = time.monotonic()
+    response = run(agent, lambda: agent.post(payload("hi"), timeout=5, deadline=10))
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 1
+    assert agent.retries == 1
+
+
+def test_retry_after_past_the_deadline_gives_up(agent_stub, monkeypatch):
+    agent = make_agent(agent_stub, monkeypatch, retry_max_delay=5)
+    agent_stub.respond(429, {"detail": "slow down"}, {"Retry-After": "3"})
+
+    started = time.monotonic()
+    response = run(agent, lambda: agent.post(payload("hi"), timeout=5, deadline=1))
+
+    assert response.status_code == 429
+    assert time.monotonic() - started < 1
+    assert agent.retries == 0
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_probe(agent, agent_stub):
+    for _ in range(3):
+        agent_stub.respond(500)
+
+    async def scenario():
+        assert (await agent.post(payload("down"), timeout=5, deadline=10)).status_code == 500
+        assert agent.breaker.state() == "open" and agent.breaker.trips == 1
+        with pytest.raises(index.AgentUnavailableError):
+            await agent.post(payload("fails fast"), timeout=5, deadline=10)
+        assert len(agent_stub.requests) == 3 and agent.rejected == 1
+
+        agent.breaker.opened_at -= agent.breaker.reset_seconds
+        assert agent.breaker.state() == "half_open"
+        assert (await agent.post(payload("probe"), timeout=5, deadline=10)).status_code == 200
+        assert agent.breaker.state() == "closed"
+
+    run(agent, scenario)
+
+
+def test_failed_probe_reopens_the_breaker(agent, agent_stub):
+    for _ in range(4):
+        agent_stub.respond(500)
+
+    async def scenario():
+        await agent.post(payload("down"), timeout=5, deadline=10)
+        agent.breaker.opened_at -= agent.breaker.reset_seconds
+        with pytest.raises(index.AgentUnavailableError):
+            await agent.post(payload("probe"), timeout=5, deadline=10)
+        assert agent.breaker.state() == "open"
+        assert agent.breaker.trips == 1 and not agent.breaker.probing
+
+    run(agent, scenario)
+    assert len(agent_stub.requests) == 4
+
+
+def test_deadline_bounds_a_hung_call(agent, agent_stub):
+    agent_stub.hang()
+
+    started = time.monotonic()
+    with pytest.raises(index.AgentUnavailableError, match="deadline"):
+        run(agent, lambda: agent.post(payload("hi"), timeout=30, deadline=0.3))
+
+    assert time.monotonic() - started < 2
+    assert agent.deadline_exceeded == 1
+    assert agent.breaker.consecutive_failures == 1
+    assert agent.stats()["in_flight"] == 0
+
+
+def test_waiting_for_a_slot_is_not_an_agent_failure(agent_stub, monkeypatch):
+    agent = make_agent(agent_stub, monkeypatch, max_concurrent=1)
+    agent_stub.hang()
+
+    async def scenario():
+        hung = asyncio.create_task(agent.post(payload("hung"), timeout=30, deadline=30))
+        while not agent_stub.requests:
+            await asyncio.sleep(0.01)
+        try:
+            with pytest.raises(index.AgentUnavailableError, match="in progress"):
+                await agent.post(payload("queued"), timeout=30, deadline=0.2)
+        finally:
+            hung.cancel()
+            await asyncio.gather(hung, return_exceptions=True)
+
+    run(agent, scenario)
+    assert agent.slot_timeouts == 1 and agent.deadline_exceeded == 0
+    assert agent.breaker.consecutive_failures == 0
+    assert len(agent_stub.requests) == 1
+
+
+def test_deadline_bounds_a_stream(agent, agent_stub):
+    agent_stub.respond_stream([f"part {i}" for i in range(20)] + ["[DONE]"], event_delay=0.1)
+    events = []
+
+    async def scenario():
+        async for event in agent.stream(payload("hi"), 5, 0.5):
+            events.append(event)
+
+    started = time.monotonic()
+    with pytest.raises(index.AgentUnavailableError, match="deadline"):
+        run(agent, scenario)
+
+    assert time.monotonic() - started < 1.5
+    assert 0 < len(events) < 20
+    assert agent.deadline_exceeded == 1
+    assert agent.stats()["in_flight"] == 0
+
+
+def test_deadline_bounds_a_stream_that_never_starts(agent, agent_stub):
+    agent_stub.hang()
+
+    async def scenario():
+        return [event async for event in agent.stream(payload("hi"), 30, 0.3)]
+
+    with pytest.raises(index.AgentUnavailableError, match="deadline"):
+        run(agent, scenario)
+    assert agent.breaker.consecutive_failures == 1
+
+
+def test_comparison_with_a_failing_agent_ends_in_error(agent, agent_stub):
+    for _ in range(3):
+        agent_stub.respond(503, {"detail": "unavailable"})
+    comparison = compare(agent)
+
+    assert comparison["status"] == "error"
+    assert "503" in comparison["error"]
+
+
+def test_comparison_with_an_open_breaker_ends_in_error(agent, agent_stub):
+    agent.breaker.opened_at = time.monotonic()
+    comparison = compare(agent)
+
+    assert comparison["status"] == "error"
+    assert "paused" in comparison["error"]
+    assert agent_stub.requests == []
+
+
+def test_comparison_past_its_deadline_ends_in_error(agent, agent_stub, monkeypatch):
+    monkeypatch.setattr(index, "LYZR_COMPARE_DEADLINE", 0.3)
+    agent_stub.hang()
+    comparison = compare(agent)
+
+    assert comparison["status"] == "error"
+    assert "deadline" in comparison["error"]
+
+
+def test_stale_sweep_fails_only_rows_older_than_any_live_call():
+    assert index.COMPARISON_STALE_SECONDS > index.LYZR_COMPARE_DEADLINE
+    db = index.SessionLocal()
+    try:
+        stale, live = str(uuid.uuid4()), str(uuid.uuid4())
+        db.add(index.ReportComparison(
+            comparison_id=stale, session_id="s", status="pending",
+            created_at=datetime.now() - timedelta(seconds=index.COMPARISON_STALE_SECONDS + 1)
+        ))
+        db.add(index.ReportComparison(
+            comparison_id=live, session_id="s", status="pending",
+            created_at=datetime.now() - timedelta(seconds=index.LYZR_COMPARE_DEADLINE)
+        ))
+        db.commit()
+
+        index.fail_stale_comparisons(db)
+        db.expire_all()
+        assert db.get(index.ReportComparison, stale).status == "error"
+        assert db.get(index.ReportComparison, live).status == "pending"
+    finally:
+        db.close()
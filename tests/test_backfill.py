@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+import index
+
+CRM_RECORDS = [{"No": 1, "フェーズ": "A", "案件名": "P1", "受注金額（ネット）": 1.2,
+                "契約開始日": "2024/05/01", "契約終了日": "2025/04/30", "会社名": "C"}] * 3
+DATACODE_RECORDS = [{"顧客名": "X", "親コード": "PC", "案件名": "P1"}]
+
+
+def erp_records(job_no, sales_date, operating_profit, count):
+    return [{"JOBNo.": job_no, "案件名": "P1", "売上計上日": sales_date, "営業利益": operating_profit}] * count
+
+
+async def upload(client, path, records):
+    response = await client.post(path, json={"file_name": "test", "name": "test", "month": "September",
+                                             "year": "2024", "records": records})
+    assert response.status_code == 200, response.text
+    return response.json()["upload_id"]
+
+
+async def wait_for_job(client, job_id):
+    for _ in range(200):
+        job = (await client.get(f"/api/report_jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.parametrize("engine", ["python", "sql", "materialized"])
+def test_backfill_runs_as_a_report_job(engine):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            crm = await upload(client, "/api/upload/crm", CRM_RECORDS)
+            erp = await upload(client, "/api/upload/erp/sales", erp_records(123, "10/1/2024", "1,000", 7))
+            other_erp = await upload(client, "/api/upload/erp/sales", erp_records(55, "11/1/2024", "2,000", 2))
+            datacode = await upload(client, "/api/upload/datacode", DATACODE_RECORDS)
+            expected = (await client.post("/api/generate_report", json={
+                "upload_ids": [crm, other_erp, datacode], "name": "r", "engine": engine
+            })).json()["report_snapshot"]
+
+            submitted = (await client.post("/api/reports/backfill", json={
+                "upload_triples": [[crm, erp, datacode], [crm, other_erp, datacode], [crm, erp, 999999], [crm, erp]],
+                "engine": engine
+            })).json()
+            assert submitted["status"] == "queued"
+            job = await wait_for_job(client, submitted["job_id"])
+            return job, expected
+
+    job, expected = asyncio.run(scenario())
+    assert job["status"] == "completed", job["error"]
+    summary = job["result"]
+    assert (summary["reports_written"], summary["failed"]) == (2, 2)
+    # Each upload is loaded once; DB-built halves never load their raw rows
+    assert summary["uploads_loaded"] == {"python": 4, "sql": 2, "materialized": 1}[engine]
+    db = index.SessionLocal()
+    try:
+        report = db.get(index.PerformanceReportGenerationHistory, summary["report_ids"][1])
+        assert report.report_snapshot == expected
+    finally:
+        db.close()
+
+
+def test_backfill_rejects_a_request_without_triples_or_range():
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            return await client.post("/api/reports/backfill", json={})
+
+    assert asyncio.run(scenario()).status_code == 400
@@ -0,0 +1,88 @@
+import calendar
+import random
+from datetime import date
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+import index
+
+BILLING_METHODS = [None, 0, -1, -12, 1, 2, 3, 6, 12, 24, 36, 120]
+
+
+def month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def random_contract(rng):
+    start_year, start_month = rng.randint(2020, 2027), rng.randint(1, 12)
+    if rng.random() < 0.4:
+        start_date = month_end(start_year, start_month)
+    else:
+        start_date = date(start_year, start_month, rng.randint(1, 28))
+
+    roll = rng.random()
+    if roll < 0.1:
+        end_date = date(9999, 12, 31)
+    elif roll < 0.3:
+        end_date = start_date - relativedelta(days=rng.randint(1, 800))
+    elif roll < 0.5:
+        end_date = month_end(rng.randint(2020, 2030), rng.randint(1, 12))
+    else:
+        end_date = start_date + relativedelta(days=rng.randint(0, 1500))
+
+    billing_method = rng.choice(BILLING_METHODS)
+    if end_date.year == 9999 and not billing_method:
+        # The reference steps through every installment up to year 9999; keep those cases few
+        billing_method = None if rng.random() < 0.1 else 12
+    return rng.choice([0.0, 1.0, 1234567.0, 0.001]), billing_method, start_date, end_date
+
+
+def reference_schedule(monthly_sales, financial_year_start):
+    """calculate_monthly_net_sales output laid out over the 12 fiscal months"""
+    schedule = []
+    for slot in range(12):
+        year, month = divmod(financial_year_start.month - 1 + slot, 12)
+        year += financial_year_start.year
+        # Fiscal months past December 9999 cannot be billed
+        schedule.append(monthly_sales.get(date(year, month + 1, 1)) if year <= 9999 else None)
+    return schedule
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fiscal_billing_schedule_matches_calculate_monthly_net_sales(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        order_amount, billing_method, start_date, end_date = random_contract(rng)
+        financial_year_start = date(rng.randint(2020, 2029), 4, 1)
+        monthly_sales = index.calculate_monthly_net_sales(order_amount, billing_method, start_date, end_date)
+        assert index.fiscal_billing_schedule(
+            order_amount, billing_method, start_date, end_date, financial_year_start
+        ) == reference_schedule(monthly_sales, financial_year_start), \
+            (order_amount, billing_method, start_date, end_date, financial_year_start)
+
+
+@pytest.mark.parametrize("billing_method", [None, 0, -1])
+@pytest.mark.parametrize("start_date, end_date", [
+    (date(2024, 1, 31), date(2024, 2, 29)),
+    (date(2024, 1, 31), date(2024, 2, 28)),
+    (date(2023, 8, 31), date(2024, 2, 29)),
+    (date(2024, 3, 31), date(2024, 3, 30)),
+    (date(2024, 6, 15), date(2024, 5, 1)),
+    (date(2024, 12, 31), date(9999, 12, 31)),
+])
+def test_edge_contracts_match_calculate_monthly_net_sales(billing_method, start_date, end_date):
+    monthly_sales = index.calculate_monthly_net_sales(1200.0, billing_method, start_date, end_date)
+    for financial_year_start in (date(2023, 4, 1), date(2024, 4, 1), date(2025, 4, 1), date(9999, 4, 1)):
+        assert index.fiscal_billing_schedule(
+            1200.0, billing_method, start_date, end_date, financial_year_start
+        ) == reference_schedule(monthly_sales, financial_year_start)
+
+
+def test_contract_month_span_matches_relativedelta():
+    rng = random.Random(0)
+    for _ in range(2000):
+        start_date = date(rng.randint(2020, 2027), rng.randint(1, 12), 1) + relativedelta(days=rng.randint(0, 30))
+        end_date = start_date + relativedelta(days=rng.randint(-900, 900))
+        delta = relativedelta(end_date, start_date)
+        assert index.contract_month_span(start_date, end_date) == delta.years * 12 + delta.months + 1
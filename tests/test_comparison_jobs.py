@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import httpx
+
+import index
+
+REPORT = [{"親コード": "P", "顧客名": "c", "案件名": "n", "案件ランク": "A", "案件コード": "0000001", "純売上額": 1.0}]
+
+
+def test_comparison_is_answered_in_the_background(agent, agent_stub):
+    agent_stub.delay = 0.3
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            started = time.monotonic()
+            submitted = (await client.post("/api/compare_reports", json={
+                "old_report": REPORT, "new_report": REPORT, "query": "what changed?", "bypass_cache": True
+            })).json()
+            answered_in = time.monotonic() - started
+            pending = (await client.get(f"/api/comparison/{submitted['comparison_id']}")).json()
+            await asyncio.gather(*index.comparison_tasks)
+            finished = (await client.get(f"/api/comparison/{submitted['comparison_id']}")).json()
+        await agent.aclose()
+        return submitted, answered_in, pending, finished
+
+    submitted, answered_in, pending, finished = asyncio.run(scenario())
+    assert submitted["status"] == "pending" and answered_in < agent_stub.delay
+    assert pending["status"] == "pending"
+    assert finished["status"] == "success" and finished["result"].startswith("stub: ")
+    assert index.comparison_results[submitted["comparison_id"]] == finished
+
+
+def test_comparison_result_store_is_bounded():
+    assert index.comparison_results.maxsize == index.COMPARISON_RESULT_CACHE_SIZE
+    assert index.comparison_results.ttl == index.COMPARISON_RESULT_TTL_SECONDS
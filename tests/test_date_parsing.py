@@ -0,0 +1,36 @@
+import random
+from datetime import date
+
+import pytest
+
+import index
+
+DATE_STRINGS = [
+    "10/1/2024", "2024/10/01", "10/1/24", "24/10/01", "10/01/24", "2024年10月1日", "2024-10-01", "2024.10.1",
+    "２０２４／１０／０１", "13/31/2024", "31/1/2024", "2/29/2023", "not a date", "", "  ", None
+]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_column_parser_matches_parse_date(seed):
+    rng = random.Random(seed)
+    values = [rng.choice(DATE_STRINGS) for _ in range(300)]
+    parser = index.DateColumnParser()
+    assert [parser(value) for value in values] == [index.parse_date(value) for value in values]
+
+
+def test_column_parser_searches_once_then_takes_the_fast_path():
+    values = [f"{month}/{day}/2024" for month in range(1, 13) for day in range(1, 29)]
+    parser = index.DateColumnParser()
+    assert [parser(value) for value in values] == [date(2024, month, day) for month in range(1, 13) for day in range(1, 29)]
+    assert parser.format == "%m/%d/%Y"
+    assert (parser.full_searches, parser.fast_path_hits) == (1, len(values) - 1)
+
+    parser(values[0])
+    assert parser.fast_path_hits == len(values) - 1
+
+
+def test_two_digit_year_keeps_the_shadowing_format():
+    parser = index.DateColumnParser()
+    assert parser("24/10/31") == index.parse_date("24/10/31")
+    assert parser("10/01/24") == index.parse_date("10/01/24") == date(2024, 10, 1)
@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime, timedelta
+
+import index
+
+
+def add_turn(db, session_id, query, created_at):
+    comparison_id = str(uuid.uuid4())
+    db.add(index.ReportComparison(comparison_id=comparison_id, session_id=session_id, query_text=query,
+                                  old_report_size=1, new_report_size=1, status="pending", created_at=created_at))
+    db.commit()
+    return comparison_id
+
+
+def test_turn_answered_after_newer_turns_were_folded_is_kept(monkeypatch):
+    monkeypatch.setattr(index, "FOLLOW_UP_HISTORY_MAX_TURNS", 2)
+    session_id = str(uuid.uuid4())
+    asked = datetime.now() - timedelta(minutes=10)
+    db = index.SessionLocal()
+    try:
+        slow = add_turn(db, session_id, "slow question", asked)
+        for minute, query in enumerate(["first", "second", "third"], start=1):
+            index.complete_comparison(db, add_turn(db, session_id, query, asked + timedelta(minutes=minute)),
+                                      "success", result=f"{query} answer")
+        history = index.follow_up_history(db, session_id)
+        assert "Q: third" in history and "Q: second" in history and "first" in history.split("\n")[1]
+
+        # The slow turn was asked before every folded turn but answers last
+        index.complete_comparison(db, slow, "success", result="slow answer")
+        history = index.follow_up_history(db, session_id)
+        assert history.endswith("Q: slow question\nA: slow answer")
+
+        index.complete_comparison(db, add_turn(db, session_id, "fourth", datetime.now()), "success", result="x")
+        index.complete_comparison(db, add_turn(db, session_id, "fifth", datetime.now()), "success", result="y")
+        summary = db.get(index.ComparisonSessionSummary, session_id)
+        index.follow_up_history(db, session_id)
+        db.refresh(summary)
+        assert "slow question" in summary.summary and summary.turns_summarized == 4
+    finally:
+        db.close()
+
+
+def test_concurrent_first_fold_reuses_the_other_summary(monkeypatch):
+    monkeypatch.setattr(index, "FOLLOW_UP_HISTORY_MAX_TURNS", 1)
+    session_id = str(uuid.uuid4())
+    db = index.SessionLocal()
+    try:
+        for query in ("first", "second"):
+            index.complete_comparison(db, add_turn(db, session_id, query, datetime.now()), "success", result="a")
+
+        fold_into_summary = index.fold_into_summary
+
+        def fold_after_a_concurrent_request(state, turns):
+            other = index.SessionLocal()
+            try:
+                other.add(index.ComparisonSessionSummary(session_id=session_id, summary="Q: from the other request",
+                                                         turns_summarized=1, summarized_until=turns[-1].completed_at))
+                other.commit()
+            finally:
+                other.close()
+            fold_into_summary(state, turns)
+
+        monkeypatch.setattr(index, "fold_into_summary", fold_after_a_concurrent_request)
+        history = index.follow_up_history(db, session_id)
+        assert "Q: from the other request" in history and history.endswith("Q: second\nA: a")
+    finally:
+        db.close()
@@ -0,0 +1,131 @@
+import io
+
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+import index
+
+UPLOAD = {"file_name": "test", "name": "test", "month": "September", "year": "2024"}
+
+
+def erp_record(job_no, sales_date):
+    return {"JOBNo.": job_no, "案件名": "n", "売上計上日": sales_date, "売上金額": "1,000", "営業利益": "100"}
+
+
+def raw_rows(model, upload_id):
+    db = index.SessionLocal()
+    try:
+        return db.query(model).filter(model.upload_id == upload_id).order_by(model.id).all()
+    finally:
+        db.close()
+
+
+def test_bulk_upload_inserts_every_row_in_one_batch():
+    records = [erp_record(f"J{i}", "2024/09/01") for i in range(5)]
+    with TestClient(index.app) as client:
+        response = client.post("/api/upload/erp/sales", json={**UPLOAD, "records": records})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["ingest"]["rows"] == 5 and body["ingest"]["batches"] == 1
+    rows = raw_rows(index.ERPSalesRaw, body["upload_id"])
+    assert [row.job_no for row in rows] == [f"J{i}" for i in range(5)]
+    assert rows[0].sales_amount == 1000 and str(rows[0].sales_date) == "2024-09-01"
+
+
+def test_invalid_dates_are_counted_not_printed_per_row(capsys):
+    records = [erp_record(f"J{i}", "not a date") for i in range(3)] + [erp_record("J9", "2024/09/01")]
+    with TestClient(index.app) as client:
+        response = client.post("/api/upload/erp/sales", json={**UPLOAD, "records": records})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["ingest"]["rows"] == 4
+    assert body["ingest"]["defaulted_dates"] == 3
+    assert "Invalid date for JOB" not in capsys.readouterr().out
+    rows = raw_rows(index.ERPSalesRaw, body["upload_id"])
+    assert sum(row.sales_date == index.datetime.now().date() for row in rows) == 3
+
+
+def stream_upload(client, path, body, **params):
+    query = {"file_name": "test", "name": "test", "month": "September", "year": "2024", **params}
+    return client.post(path, params=query, content=body)
+
+
+def ndjson(records):
+    return "\n".join(index.json.dumps(record, ensure_ascii=False) for record in records).encode("utf-8")
+
+
+def test_stream_upload_reports_per_batch_progress():
+    records = [erp_record(f"J{i}", "2024/09/01") for i in range(4)]
+    records.insert(2, {"案件名": "no job number"})
+    with TestClient(index.app) as client:
+        response = stream_upload(client, "/api/upload/erp/sales/stream", ndjson(records), batch_size=2)
+
+    assert response.status_code == 200, response.text
+    ingest = response.json()["ingest"]
+    assert (ingest["rows"], ingest["rejected_rows"], ingest["batches"]) == (4, 1, 2)
+    assert ingest["errors"][0]["row"] == 3
+    assert [(p["batch"], p["rows"], p["total_rows"]) for p in ingest["batch_progress"]] == [(1, 2, 2), (2, 2, 4)]
+
+
+def test_stream_upload_keeps_only_the_latest_batch_progress(monkeypatch):
+    monkeypatch.setattr(index, "MAX_REPORTED_BATCHES", 2)
+    records = [erp_record(f"J{i}", "2024/09/01") for i in range(5)]
+    with TestClient(index.app) as client:
+        response = stream_upload(client, "/api/upload/erp/sales/stream", ndjson(records), batch_size=1)
+
+    ingest = response.json()["ingest"]
+    assert ingest["batches"] == 5
+    assert [p["batch"] for p in ingest["batch_progress"]] == [4, 5]
+
+
+def test_stream_upload_rejects_undecodable_csv():
+    body = "JOBNo.,案件名\nJ1,案件\n".encode("cp932")
+    with TestClient(index.app) as client:
+        response = stream_upload(client, "/api/upload/erp/sales/stream", body, format="csv")
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("文字コードが不正です")
+
+
+def file_upload(client, path, file_name, content, **form):
+    data = {"name": "test", "month": "September", "year": "2024", **form}
+    return client.post(path, data=data, files={"file": (file_name, content)})
+
+
+def test_csv_file_upload_detects_shift_jis_past_an_ascii_first_chunk(monkeypatch):
+    monkeypatch.setattr(index, "UPLOAD_READ_CHUNK_SIZE", 16)
+    lines = ["remarks_column_x,JOBNo.,売上計上日,売上金額"] + [f"r,J{i},2024/09/01,100" for i in range(6)]
+    # the first 16-byte chunk is ASCII; the Japanese column names follow in later chunks
+    content = ("\n".join(lines) + "\n").encode("cp932")
+    with TestClient(index.app) as client:
+        response = file_upload(client, "/api/upload/erp/sales/file", "sales.csv", content)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["ingest"]["rows"] == 6
+
+
+def test_csv_file_upload_maps_full_width_headers():
+    content = "ＪＯＢＮｏ．,案件名,売上計上日,売上金額\nJ1,案件,2024/09/01,\"1,000\"\n".encode("utf-8-sig")
+    with TestClient(index.app) as client:
+        response = file_upload(client, "/api/upload/erp/sales/file", "sales.csv", content)
+
+    assert response.status_code == 200, response.text
+    rows = raw_rows(index.ERPSalesRaw, response.json()["upload_id"])
+    assert [(row.job_no, row.project_name, row.sales_amount) for row in rows] == [("J1", "案件", 1000)]
+
+
+def test_xlsx_file_upload_reads_the_active_sheet():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["顧客名", "案件名", "親コード"])
+    sheet.append(["顧客", "案件", 12345])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    with TestClient(index.app) as client:
+        response = file_upload(client, "/api/upload/datacode/file", "codes.xlsx", buffer.getvalue())
+
+    assert response.status_code == 200, response.text
+    rows = raw_rows(index.DataCodeRaw, response.json()["upload_id"])
+    assert [(row.customer_name, row.parent_code) for row in rows] == [("顧客", "12345")]
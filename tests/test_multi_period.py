@@ -0,0 +1,49 @@
+from fastapi.testclient import TestClient
+
+import index
+
+CRM_RECORDS = [{"No": 1, "フェーズ": "A", "案件名": "P1", "受注金額（ネット）": 1.2, "請求方法": 12,
+                "契約開始日": "2024/05/01", "契約終了日": "2025/04/30", "会社名": "C"}]
+ERP_RECORDS = [{"JOBNo.": 7, "案件名": "P1", "売上計上日": sales_date, "営業利益": profit}
+               for sales_date, profit in (("10/1/2024", "1,000"), ("3/1/2025", "200"), ("11/1/2025", "30"))]
+DATACODE_RECORDS = [{"顧客名": "X", "親コード": "PC", "案件名": "P1"}]
+
+
+def upload(client, path, records):
+    response = client.post(path, json={"file_name": "test", "name": "test", "month": "September",
+                                       "year": "2024", "records": records})
+    assert response.status_code == 200, response.text
+    return response.json()["upload_id"]
+
+
+def erp_project(report):
+    return next(project for project in report if project["案件コード"] == "0000007")
+
+
+def test_each_period_is_saved_as_its_own_report():
+    with TestClient(index.app) as client:
+        upload_ids = [upload(client, "/api/upload/crm", CRM_RECORDS),
+                      upload(client, "/api/upload/erp/sales", ERP_RECORDS),
+                      upload(client, "/api/upload/datacode", DATACODE_RECORDS)]
+        single = client.post("/api/generate_report", json={"upload_ids": upload_ids, "name": "r", "engine": "python"})
+        response = client.post("/api/generate_report/periods", json={"upload_ids": upload_ids, "name": "r", "periods": [
+            {"month": "September", "year": "2024"},
+            {"month": "September", "year": "2025"},
+            {"month": "December", "year": "2024", "window": "rolling"}
+        ]})
+
+    assert response.status_code == 200, response.text
+    reports = response.json()["reports"]
+    assert len({report["report_id"] for report in reports}) == 3
+    assert [report["period"]["label"] for report in reports] == ["2024/04〜2025/03", "2025/04〜2026/03", "2024/01〜2024/12"]
+    assert reports[0]["report_snapshot"] == single.json()["report_snapshot"]
+    assert (erp_project(reports[0]["report_snapshot"])["10月"], erp_project(reports[0]["report_snapshot"])["3月"]) == (1000, 200)
+    assert erp_project(reports[1]["report_snapshot"])["純売上額"] == 30
+    assert erp_project(reports[2]["report_snapshot"])["純売上額"] == 1000
+
+    db = index.SessionLocal()
+    try:
+        saved = db.get(index.PerformanceReportGenerationHistory, reports[2]["report_id"])
+        assert saved.name == "r (2024/01〜2024/12)" and saved.report_snapshot == reports[2]["report_snapshot"]
+    finally:
+        db.close()
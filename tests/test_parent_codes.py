@@ -0,0 +1,35 @@
+from datetime import date
+
+import index
+
+DATACODE = [
+    {"project_name": "P1", "parent_code": "PC1"},
+    {"project_name": "P2", "parent_code": "PC2"},
+    {"project_name": "P1", "parent_code": "later"},
+    {"project_name": None, "parent_code": "unnamed"}
+]
+
+
+def erp_row(job_no, project_name):
+    return {"job_no": job_no, "project_name": project_name, "client_name": "client",
+            "sales_date": date(2024, 10, 1), "operating_profit": 100}
+
+
+def linear_scan(project_name):
+    return next((x["parent_code"] for x in DATACODE if x.get("project_name") == project_name), None)
+
+
+def test_index_keeps_the_first_parent_code_per_name():
+    assert index.build_parent_code_index(DATACODE) == {"P1": "PC1", "P2": "PC2", None: "unnamed"}
+
+
+def test_index_is_shared_by_reports_on_the_same_datacode_upload():
+    parent_code_index = index.get_parent_code_index(-1, DATACODE)
+    assert index.get_parent_code_index(-1, []) is parent_code_index
+    assert index.get_parent_code_index(-2, []) == {}
+
+
+def test_report_resolves_parent_codes_like_a_linear_scan():
+    erp = [erp_row(str(i), name) for i, name in enumerate(["P1", "P2", "P1", "P3"], start=1)]
+    report = index.create_performance_report(erp, DATACODE, [], "September", "2024")
+    assert [project["親コード"] for project in report] == [linear_scan(name) or "client" for name in ["P1", "P2", "P1", "P3"]]
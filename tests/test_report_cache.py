@@ -0,0 +1,107 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import index
+
+CRM_RECORDS = [{"No": 1, "フェーズ": "A", "案件名": "P1", "受注金額（ネット）": 1.2,
+                "契約開始日": "2024/05/01", "契約終了日": "2025/04/30", "会社名": "C"}]
+ERP_RECORDS = [{"JOBNo.": 1, "案件名": "P1", "売上計上日": "10/1/2024", "営業利益": "1,000"}]
+DATACODE_RECORDS = [{"顧客名": "X", "親コード": "PC", "案件名": "P1"}]
+
+
+def upload(client, path, records):
+    response = client.post(path, json={"file_name": "test", "name": "test", "month": "September",
+                                       "year": "2024", "records": records})
+    assert response.status_code == 200, response.text
+    return response.json()["upload_id"]
+
+
+def upload_triple(client):
+    return [upload(client, "/api/upload/crm", CRM_RECORDS),
+            upload(client, "/api/upload/erp/sales", ERP_RECORDS),
+            upload(client, "/api/upload/datacode", DATACODE_RECORDS)]
+
+
+def generate(client, upload_ids):
+    response = client.post("/api/generate_report", json={"upload_ids": upload_ids, "name": "r", "engine": "python"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_cache_table_points_at_the_saved_report():
+    with TestClient(index.app) as client:
+        upload_ids = upload_triple(client)
+        first = generate(client, upload_ids)
+        index.report_cache.clear()
+        second = generate(client, upload_ids)
+
+    assert not first["cache_hit"] and second["cache_hit"]
+    assert second["report_snapshot"] == first["report_snapshot"]
+    db = index.SessionLocal()
+    try:
+        entry = db.query(index.ReportCacheEntry).filter_by(crm_upload_id=upload_ids[0]).one()
+        assert entry.report_id == first["report_id"]
+        assert not hasattr(entry, "report_snapshot")
+    finally:
+        db.close()
+
+
+def test_cache_entry_without_its_report_is_a_miss():
+    with TestClient(index.app) as client:
+        upload_ids = upload_triple(client)
+        first = generate(client, upload_ids)
+        index.report_cache.clear()
+        db = index.SessionLocal()
+        try:
+            db.query(index.ReportCacheEntry).filter_by(crm_upload_id=upload_ids[0]).update({"report_id": None})
+            db.commit()
+        finally:
+            db.close()
+        second = generate(client, upload_ids)
+
+    assert not second["cache_hit"]
+    assert second["report_snapshot"] == first["report_snapshot"]
+
+
+def test_stored_halves_are_slices_of_the_saved_report():
+    other_erp = [{"JOBNo.": 2, "案件名": "P2", "売上計上日": "11/1/2024", "営業利益": "2,000"}] * 2
+    with TestClient(index.app) as client:
+        crm, erp, datacode = upload_triple(client)
+        first = generate(client, [crm, erp, datacode])
+        other = upload(client, "/api/upload/erp/sales", other_erp)
+        second = generate(client, [crm, other, datacode])
+        db = index.SessionLocal()
+        try:
+            index.clear_report_caches(db)
+            db.commit()
+        finally:
+            db.close()
+        rebuilt = generate(client, [crm, other, datacode])
+
+    assert second["reused"] == {"report": False, "erp": False, "crm": True}
+    assert second["report_snapshot"] == rebuilt["report_snapshot"]
+    assert second["report_snapshot"][-1] == first["report_snapshot"][-1]
+    db = index.SessionLocal()
+    try:
+        partial = db.query(index.ReportPartial).filter_by(upload_id=other).one()
+        assert (partial.report_id, partial.project_offset) == (rebuilt["report_id"], 0)
+        assert not hasattr(partial, "projects")
+    finally:
+        db.close()
+
+
+def test_report_database_work_runs_on_db_threads(monkeypatch):
+    threads = []
+    for name in ("resolve_report_uploads", "get_cached_report", "get_report_partial", "store_report_partial",
+                 "store_cached_report"):
+        def recorded(*args, _original=getattr(index, name), **kwargs):
+            threads.append(threading.current_thread().name)
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(index, name, recorded)
+
+    with TestClient(index.app) as client:
+        generate(client, upload_triple(client))
+
+    assert len(threads) == 7
+    assert all(name.startswith("report-db") for name in threads)
@@ -0,0 +1,58 @@
+import index
+
+
+def project(code, rank, name, amount):
+    return {"親コード": "PC", "顧客名": "C", "案件名": name, "案件ランク": rank, "案件コード": code,
+            **{month: 0 for month in index.JP_FISCAL_MONTHS}, "4月": amount, "純売上額": amount}
+
+
+def test_shared_code_pairs_within_its_half():
+    erp = project("0000123", "SA", "ERP job", 100.0)
+    crm = project("0000123", "A", "CRM deal", 500.0)
+    diff = index.diff_reports([erp, crm], [{**crm, "案件ランク": "B"}])
+
+    assert [removed["案件名"] for removed in diff["removed"]] == ["ERP job"]
+    assert diff["added"] == []
+    assert diff["rank_changes"] == [{"案件コード": "0000123", "案件名": "CRM deal", "old_rank": "A", "new_rank": "B"}]
+    assert diff["changes"] == []
+    assert diff["summary"]["total_delta"] == -100.0
+
+
+def test_crm_project_added_next_to_an_existing_erp_code():
+    erp = project("0000123", "SA", "ERP job", 100.0)
+    crm = project("0000123", "B", "CRM deal", 500.0)
+    diff = index.diff_reports([erp], [erp, crm])
+
+    assert [added["案件名"] for added in diff["added"]] == ["CRM deal"]
+    assert diff["removed"] == [] and diff["summary"]["unchanged"] == 1
+
+
+def save_report(snapshot):
+    db = index.SessionLocal()
+    try:
+        report = index.PerformanceReportGenerationHistory(report_snapshot=snapshot, upload_id=1, name="test",
+                                                          month="September", year="2024")
+        db.add(report)
+        db.commit()
+        return report.report_id
+    finally:
+        db.close()
+
+
+def test_one_sided_request_fills_only_the_missing_side_from_the_session():
+    erp = project("0000001", "SA", "ERP job", 100.0)
+    old_id, new_id, other_id = save_report([erp]), save_report([erp, project("0000002", "A", "CRM", 5.0)]), \
+        save_report([{**erp, "純売上額": 300.0}])
+    index.comparison_session_reports["one-sided"] = (old_id, new_id)
+
+    db = index.SessionLocal()
+    try:
+        resolved = index.resolve_comparison_reports(db, index.ReportDiffRequest(new_report_id=other_id), "one-sided")
+        assert (resolved["old_report_id"], resolved["new_report_id"]) == (old_id, other_id)
+        assert resolved["diff"]["summary"]["total_delta"] == 200.0
+
+        posted = [project("0000009", "B", "posted", 1.0)]
+        resolved = index.resolve_comparison_reports(db, index.ReportDiffRequest(old_report=posted), "one-sided")
+        assert resolved["old_report"] == posted and resolved["new_report_id"] == other_id
+    finally:
+        db.close()
@@ -0,0 +1,90 @@
+import random
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import index
+
+PROJECT_NAMES = [f"P{i}" for i in range(30)] + [None, ""]
+
+
+def random_date(rng):
+    if rng.random() < 0.05:
+        return None
+    return date(rng.randint(2022, 2026), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def random_report_inputs(seed):
+    rng = random.Random(seed)
+    erp = [
+        {
+            # None and "²" (isdigit() but not int()) are errors in both engines
+            "job_no": rng.choice([str(rng.randint(1, 50)), f"A{rng.randint(1, 5)}", f"00{rng.randint(1, 50)}"] * 10
+                                 + [None, "²"]),
+            "client_name": rng.choice(["C1", "C2", None]),
+            "project_name": rng.choice(PROJECT_NAMES),
+            "operating_profit": rng.choice([Decimal(str(round(rng.uniform(-1e5, 1e6), 2))), Decimal("0"), None, "x"]),
+            "sales_date": random_date(rng),
+        }
+        for _ in range(rng.randint(0, 300))
+    ]
+    parent_code_index = {name: rng.choice(["X", "Y", ""]) for name in PROJECT_NAMES if name}
+    crm = []
+    for _ in range(rng.randint(0, 200)):
+        start_date, end_date = random_date(rng), random_date(rng)
+        if start_date and rng.random() < 0.3:
+            start_date = start_date.replace(day=28)
+        crm.append({
+            "project_id": rng.randint(1, 80) if rng.random() < 0.97 else None,
+            "high_potential_mark": rng.random() < 0.5,
+            "phase": rng.choice(["A", "B", "C", "D", "E", "F", "SA", "受注", "見込", "", None, "x", 7]),
+            "order_amount_net": rng.choice([Decimal(str(round(rng.uniform(0, 50), 3))), Decimal("0"), None]),
+            "billing_method": rng.choice([None, 0, 1, 2, 3, 6, 12, 24, -1]),
+            "contract_start_date": start_date,
+            "contract_end_date": end_date,
+            "company_name": rng.choice(["co", None]),
+            "project_name": rng.choice(PROJECT_NAMES),
+        })
+    return erp, crm, parent_code_index
+
+
+def build_half(build, rows, parent_code_index):
+    financial_year_start, financial_year_end = index.get_fiscal_year("September", "2024")
+    summary = index.new_report_summary()
+    projects = build(rows, parent_code_index, financial_year_start, financial_year_end,
+                     index.JP_FISCAL_MONTHS, summary)
+    return list(projects.values()), summary
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_vectorized_halves_match_python_engine(seed):
+    erp, crm, parent_code_index = random_report_inputs(seed)
+    assert build_half(index.vectorized_erp_projects, erp, parent_code_index) == \
+        build_half(index.build_erp_projects, erp, parent_code_index)
+    assert build_half(index.vectorized_crm_projects, crm, parent_code_index) == \
+        build_half(index.build_crm_projects, crm, parent_code_index)
+
+
+def test_error_rows_are_counted_alike():
+    erp, crm, parent_code_index = random_report_inputs(0)
+    erp += [{"job_no": None, "project_name": "P1", "sales_date": date(2024, 9, 1), "operating_profit": 1},
+            {"job_no": "1", "project_name": "P1", "sales_date": date(2024, 9, 1), "operating_profit": "x"}]
+    crm += [{"project_id": "7", "phase": "A", "project_name": "P1"},
+            {"project_id": 7, "phase": 7, "project_name": "P1"}]
+    vectorized = build_half(index.vectorized_erp_projects, erp, parent_code_index)
+    assert vectorized == build_half(index.build_erp_projects, erp, parent_code_index)
+    assert vectorized[1]["erp_errors"] >= 2
+    vectorized = build_half(index.vectorized_crm_projects, crm, parent_code_index)
+    assert vectorized == build_half(index.build_crm_projects, crm, parent_code_index)
+    assert vectorized[1]["crm_errors"] >= 2
+
+
+def test_create_performance_report_joins_the_python_halves():
+    erp, crm, parent_code_index = random_report_inputs(1)
+    summary = index.new_report_summary()
+    report = index.create_performance_report(erp, None, crm, "September", "2024", parent_code_index, summary)
+    erp_projects, erp_summary = build_half(index.build_erp_projects, erp, parent_code_index)
+    crm_projects, crm_summary = build_half(index.build_crm_projects, crm, parent_code_index)
+    assert report == erp_projects + crm_projects
+    assert summary["erp_rows"] == erp_summary["erp_rows"] and summary["crm_rows"] == crm_summary["crm_rows"]
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import index
+
+
+def add_erp_upload(db, rows):
+    upload = index.MonthlyUpload(upload_type="ERP_Sales", file_name="test", name="test", month="September",
+                                 year="2024", upload_timestamp=datetime.now())
+    db.add(upload)
+    db.flush()
+    db.add_all(index.ERPSalesRaw(upload_id=upload.upload_id, **row) for row in rows)
+    db.flush()
+    return upload
+
+
+def test_report_rows_are_projected_dicts_in_row_order_across_batches(monkeypatch):
+    monkeypatch.setattr(index, "REPORT_STREAM_BATCH_SIZE", 2)
+    rows = [{"job_no": f"J{i}", "client_name": "c", "project_name": f"P{i}", "operating_profit": i * 100,
+             "sales_date": date(2024, 9, i + 1)} for i in range(5)]
+    db = index.SessionLocal()
+    try:
+        other = add_erp_upload(db, rows[:1])
+        upload = add_erp_upload(db, rows)
+
+        loaded = index.load_report_rows(db, "erp_sales", upload.upload_id)
+        assert loaded == rows
+        assert all(type(row) is dict for row in loaded)
+        assert len(index.load_report_rows(db, "erp_sales", other.upload_id)) == 1
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_report_rows_select_only_the_engine_columns():
+    db = index.SessionLocal()
+    try:
+        upload = index.MonthlyUpload(upload_type="DataCode", file_name="test", name="test", month="September",
+                                     year="2024", upload_timestamp=datetime.now())
+        db.add(upload)
+        db.flush()
+        db.add(index.DataCodeRaw(upload_id=upload.upload_id, customer_name="顧客", project_name="案件",
+                                 parent_code="PC1"))
+        db.flush()
+
+        assert index.load_report_rows(db, "datacode", upload.upload_id) == [
+            {"project_name": "案件", "parent_code": "PC1"}
+        ]
+    finally:
+        db.rollback()
+        db.close()
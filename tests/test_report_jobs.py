@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import index
+
+
+def add_report_job(status):
+    db = index.SessionLocal()
+    try:
+        job = index.ReportJob(
+            job_id=str(uuid.uuid4()), status=status, stage=status, upload_ids=[1, 2, 3],
+            engine="python", name="test", rows_processed=0, cache_hit=False, created_at=datetime.now()
+        )
+        db.add(job)
+        db.commit()
+        return job.job_id
+    finally:
+        db.close()
+
+
+def get_report_job(job_id):
+    db = index.SessionLocal()
+    try:
+        return index.format_report_job(db.get(index.ReportJob, job_id))
+    finally:
+        db.close()
+
+
+def test_startup_fails_interrupted_report_jobs():
+    queued, running, completed = add_report_job("queued"), add_report_job("running"), add_report_job("completed")
+    db = index.SessionLocal()
+    try:
+        assert index.fail_interrupted_report_jobs(db) == 2
+    finally:
+        db.close()
+    assert get_report_job(queued)["status"] == "failed"
+    assert get_report_job(running)["status"] == "failed"
+    assert get_report_job(completed)["status"] == "completed"
+
+
+def test_cancelled_report_job_is_marked_failed(monkeypatch):
+    started = asyncio.Event()
+
+    async def hang(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(index, "resolve_report_uploads", lambda db, upload_ids: (None, None, None))
+    monkeypatch.setattr(index, "generate_report_for_uploads", hang)
+    job_id = add_report_job("queued")
+
+    async def submit_and_cancel():
+        index.active_report_jobs[index.report_job_key([1, 2, 3], "python")] = job_id
+        task = asyncio.create_task(index.run_report_job(job_id, [1, 2, 3], "python", "test"))
+        await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return task.cancelled()
+
+    assert asyncio.run(submit_and_cancel())
+    job = get_report_job(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Job was cancelled"
+    assert index.report_job_key([1, 2, 3], "python") not in index.active_report_jobs
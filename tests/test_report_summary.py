@@ -0,0 +1,36 @@
+from datetime import date
+
+import index
+
+DATACODE = [{"project_name": "P1", "parent_code": "PC1"}]
+ERP = [
+    {"job_no": "1", "project_name": "P1", "client_name": "c", "sales_date": date(2024, 10, 1), "operating_profit": 100},
+    {"job_no": "2", "project_name": "P2", "client_name": "c2", "sales_date": date(2024, 11, 1), "operating_profit": 50},
+    {"job_no": "3", "project_name": "P1", "client_name": "c", "sales_date": None, "operating_profit": 1},
+    {"job_no": "4", "project_name": "P1", "client_name": "c", "sales_date": date(2023, 10, 1), "operating_profit": 1},
+    {"job_no": "5", "project_name": "", "client_name": "c", "sales_date": date(2024, 10, 1), "operating_profit": 1}
+]
+CRM = [
+    {"project_id": 1, "phase": "A", "project_name": "P1", "company_name": "co", "order_amount_net": 1.2,
+     "contract_start_date": date(2024, 5, 1), "contract_end_date": date(2025, 4, 30), "billing_method": 12,
+     "high_potential_mark": False},
+    {"project_id": 2, "phase": "C", "project_name": "P1", "company_name": "co", "order_amount_net": 1.2,
+     "contract_start_date": date(2024, 5, 1), "contract_end_date": date(2025, 4, 30), "billing_method": 12,
+     "high_potential_mark": False}
+]
+
+
+def test_skips_and_fallbacks_are_counted_not_printed(capsys):
+    summary = index.new_report_summary()
+    report = index.create_performance_report(ERP, DATACODE, CRM, "September", "2024", summary=summary)
+
+    assert [project["案件コード"] for project in report] == ["0000001", "0000002", "0000001"]
+    assert summary["erp_rows"] == 5 and summary["crm_rows"] == 2
+    assert summary["erp_skipped_missing_sales_date"] == 1
+    assert summary["erp_skipped_outside_fiscal_year"] == 1
+    assert summary["erp_skipped_missing_project_name"] == 1
+    assert summary["erp_fallback_parent_code"] == 1
+    assert summary["crm_skipped_not_eligible"] == 1
+    assert (summary["erp_projects"], summary["crm_projects"]) == (2, 1)
+    assert summary["erp_errors"] == summary["crm_errors"] == 0
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import index
+
+
+def test_current_schema_has_every_column():
+    assert index.missing_schema_columns() == []
+    index.ensure_schema()
+
+
+def test_startup_refuses_a_table_missing_a_column(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    index.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE report_jobs DROP COLUMN result"))
+
+    assert index.missing_schema_columns(engine) == ["report_jobs.result"]
+    with pytest.raises(RuntimeError, match="report_jobs.result"):
+        index.ensure_schema(engine)
+    engine.dispose()
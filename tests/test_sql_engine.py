@@ -0,0 +1,49 @@
+import random
+from datetime import date, datetime
+
+import pytest
+
+import index
+
+PROJECT_NAMES = ["P1", "P2", "P3", "", None]
+
+
+def random_erp_rows(seed):
+    rng = random.Random(seed)
+    return [{
+        "job_no": rng.choice(["1", "2", "0042", "J-7", "12345678"]),
+        "project_name": rng.choice(PROJECT_NAMES),
+        "client_name": rng.choice(["c1", "c2"]),
+        "sales_date": rng.choice([None, date(2023, 12, 31), date(2024, 3, 31), date(2024, 4, 1),
+                                  date(2024, rng.randint(4, 12), rng.randint(1, 28)), date(2025, 3, 31),
+                                  date(2025, 4, 1)]),
+        "operating_profit": rng.choice([None, 0, rng.randint(-500, 5000)])
+    } for _ in range(rng.randint(1, 60))]
+
+
+def erp_half(build, *args):
+    financial_year_start, financial_year_end = index.get_fiscal_year("September", "2024")
+    summary = index.new_report_summary()
+    projects = build(*args, financial_year_start, financial_year_end, index.JP_FISCAL_MONTHS, summary)
+    summary.pop("erp_aggregate_rows", None)
+    return list(projects.values()), summary
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sql_erp_half_matches_python_engine(seed):
+    rows = random_erp_rows(seed)
+    parent_code_index = {"P1": "PC1", "P3": "PC3"}
+    db = index.SessionLocal()
+    try:
+        upload = index.MonthlyUpload(upload_type="ERP_Sales", file_name="test", name="test", month="September",
+                                     year="2024", upload_timestamp=datetime.now())
+        db.add(upload)
+        db.flush()
+        db.add_all(index.ERPSalesRaw(upload_id=upload.upload_id, **row) for row in rows)
+        db.flush()
+
+        assert erp_half(index.sql_erp_projects, db, upload.upload_id, parent_code_index) == \
+            erp_half(index.build_erp_projects, rows, parent_code_index)
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import httpx
+
+import index
+
+REPORT = [{"親コード": "P", "顧客名": "c", "案件名": "n", "案件ランク": "A", "案件コード": "0000001", "純売上額": 1.0}]
+COMPARISON = {"old_report": REPORT, "new_report": REPORT, "query": "what changed?", "bypass_cache": True}
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def post_stream(agent, path, body):
+    """POST to a streaming endpoint and return its parsed events once the stream ends"""
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=index.app), base_url="http://test") as client:
+            response = await client.post(path, json=body)
+        await agent.aclose()
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return parse_events(response.text)
+
+    return asyncio.run(scenario())
+
+
+def get_comparison(comparison_id):
+    db = index.SessionLocal()
+    try:
+        return index.format_comparison(db.get(index.ReportComparison, comparison_id))
+    finally:
+        db.close()
+
+
+def test_agent_stream_yields_events_until_done(agent, agent_stub):
+    agent_stub.respond_stream(["Hel", "lo\nworld", "[DONE]", "never seen"])
+
+    async def scenario():
+        try:
+            return [event async for event in agent.stream({"message": "hi"}, 5, 30)]
+        finally:
+            await agent.aclose()
+
+    assert asyncio.run(scenario()) == ["Hel", "lo\nworld"]
+
+
+def test_chat_stream_relays_chunks_and_saves_the_report(agent, agent_stub, crm_upload):
+    text = "```json\n" + json.dumps(REPORT, ensure_ascii=False) + "\n```"
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    agent_stub.respond_stream(pieces + ["[DONE]"])
+
+    events = post_stream(agent, "/api/chat/stream", {"message": "report please", "bypass_cache": True})
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "start" and kinds[-1] == "done"
+    assert [data["text"] for kind, data in events if kind == "chunk"] == pieces
+    assert events[-1][1]["report_data"] == REPORT
+
+
+def test_heartbeats_fill_the_gaps_between_chunks(agent, agent_stub, monkeypatch):
+    monkeypatch.setattr(index, "SSE_HEARTBEAT_SECONDS", 0.05)
+    agent_stub.respond_stream(["slow", " answer", "[DONE]"], event_delay=0.3)
+
+    events = post_stream(agent, "/api/compare_reports/stream", COMPARISON)
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "done" and events[-1][1]["result"] == "slow answer"
+    first_chunk = kinds.index("chunk")
+    # 0.3s of silence at a 0.05s interval: about six heartbeats before each chunk
+    assert 3 <= kinds[:first_chunk].count("heartbeat") <= 7
+    assert 3 <= kinds[first_chunk:kinds.index("chunk", first_chunk + 1)].count("heartbeat") <= 7
+    elapsed = [data["elapsed_seconds"] for kind, data in events if kind == "heartbeat"]
+    assert elapsed == sorted(elapsed)
+
+
+def test_upstream_error_ends_the_stream_and_the_comparison(agent, agent_stub):
+    for _ in range(agent.max_retries + 1):
+        agent_stub.respond(500, {"detail": "boom"})
+
+    events = post_stream(agent, "/api/compare_reports/stream", COMPARISON)
+    assert [kind for kind, _ in events] == ["start", "error"]
+    assert "500" in events[-1][1]["error"]
+    assert get_comparison(events[0][1]["comparison_id"])["status"] == "error"
+
+
+def test_client_disconnect_leaves_the_comparison_in_error(agent, agent_stub):
+    agent_stub.respond_stream([f"part {i} " for i in range(20)] + ["[DONE]"], event_delay=0.05)
+    body = json.dumps(COMPARISON).encode("utf-8")
+    sent = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if not sent:
+            sent.append(b"")
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            sent.append(message["body"])
+            if b"event: chunk" in message["body"]:
+                disconnected.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/compare_reports/stream", "raw_path": b"/api/compare_reports/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("test", 80)
+    }
+
+    async def scenario():
+        await asyncio.wait_for(index.app(scope, receive, send), timeout=5)
+        await agent.aclose()
+
+    asyncio.run(scenario())
+    comparison_id = parse_events(b"".join(sent).decode("utf-8"))[0][1]["comparison_id"]
+    comparison = get_comparison(comparison_id)
+    assert comparison["status"] == "error"
+    assert comparison["error"] == "Stream closed before the agent finished"
+    assert comparison["result"].startswith("part 0")
+    assert agent.stats()["in_flight"] == 0
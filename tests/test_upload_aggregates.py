@@ -0,0 +1,108 @@
+from datetime import date, datetime
+
+import pytest
+
+import index
+from test_report_engines import random_report_inputs
+
+
+def add_crm_upload(db, rows):
+    upload = index.MonthlyUpload(upload_type="CRM", file_name="test", name="test", month="September", year="2024",
+                                 upload_timestamp=datetime.now())
+    db.add(upload)
+    db.flush()
+    db.add_all(index.CRMProjectRaw(upload_id=upload.upload_id, **row) for row in rows)
+    db.flush()
+    return upload
+
+
+def build_crm_half(build, *args):
+    summary = index.new_report_summary()
+    projects = build(*args, summary)
+    return list(projects.values()), summary
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_materialized_crm_half_matches_python_engine(seed):
+    _, crm, parent_code_index = random_report_inputs(seed)
+    db = index.SessionLocal()
+    try:
+        upload = add_crm_upload(db, crm)
+        stats = index.build_upload_aggregates(db, upload.upload_id, "CRM")
+        db.commit()
+        assert stats["aggregate_rows"] == stats["source_rows"] == len(crm)
+
+        rows = index.load_report_rows(db, "crm", upload.upload_id)
+        for year in ("2023", "2024", "2025"):
+            financial_year_start, financial_year_end = index.get_fiscal_year("September", year)
+            fiscal_year = (financial_year_start, financial_year_end, index.JP_FISCAL_MONTHS)
+            assert build_crm_half(
+                index.materialized_crm_projects, db, upload.upload_id, parent_code_index, *fiscal_year
+            ) == build_crm_half(index.build_crm_projects, rows, parent_code_index, *fiscal_year)
+    finally:
+        db.close()
+
+
+def test_open_ended_contract_is_one_aggregate_row():
+    contract = {
+        "project_id": 1, "phase": "A", "company_name": "co", "project_name": "P1", "order_amount_net": 1.2,
+        "contract_start_date": date(2024, 5, 31), "contract_end_date": date(9999, 12, 31),
+        "billing_method": None, "high_potential_mark": False
+    }
+    db = index.SessionLocal()
+    try:
+        upload = add_crm_upload(db, [contract])
+        assert index.build_upload_aggregates(db, upload.upload_id, "CRM")["aggregate_rows"] == 1
+        db.commit()
+        aggregate = db.query(index.CRMContractAggregate).filter_by(upload_id=upload.upload_id).one()
+        assert (aggregate.first_month, aggregate.last_month) == (date(2024, 5, 1), date(9999, 12, 1))
+
+        financial_year_start, financial_year_end = index.get_fiscal_year("September", "2024")
+        projects, _ = build_crm_half(
+            index.materialized_crm_projects, db, upload.upload_id, {}, financial_year_start, financial_year_end,
+            index.JP_FISCAL_MONTHS
+        )
+        assert projects[0]["4月"] == 0 and projects[0]["5月"] == projects[0]["3月"] == aggregate.amount
+    finally:
+        db.close()
+
+
+def test_upload_aggregated_in_the_old_layout_is_rebuilt():
+    db = index.SessionLocal()
+    try:
+        _, crm, _ = random_report_inputs(1)
+        upload = add_crm_upload(db, crm)
+        db.add(index.UploadAggregate(upload_id=upload.upload_id, upload_type="CRM", source_rows=len(crm),
+                                     aggregate_rows=0, built_at=datetime.now()))
+        db.commit()
+        index.ensure_upload_aggregates(db, upload)
+        assert db.query(index.CRMContractAggregate).filter_by(upload_id=upload.upload_id).count() == len(crm)
+    finally:
+        db.close()
+
+
+def test_crm_aggregates_stream_the_raw_rows(monkeypatch):
+    monkeypatch.setattr(index, "REPORT_STREAM_BATCH_SIZE", 3)
+    _, crm, _ = random_report_inputs(3)
+    db = index.SessionLocal()
+    try:
+        upload = add_crm_upload(db, crm)
+        rows = index.iter_report_rows(db, "crm", upload.upload_id, (index.CRMProjectRaw.id,))
+        assert next(rows)["project_id"] == crm[0]["project_id"]
+        rows.close()
+
+        assert index.build_upload_aggregates(db, upload.upload_id, "CRM")["aggregate_rows"] == len(crm)
+        aggregated = db.query(index.CRMContractAggregate.crm_row_id).filter_by(upload_id=upload.upload_id)
+        raw = db.query(index.CRMProjectRaw.id).filter_by(upload_id=upload.upload_id)
+        assert sorted(aggregated) == sorted(raw)
+    finally:
+        db.rollback()
+        db.close()
+
+
+@pytest.mark.parametrize("project_id, error", [(7, False), ("7", True), (None, True)])
+def test_contract_aggregate_flags_a_project_id_that_is_not_an_integer(project_id, error):
+    row = {"id": 1, "project_id": project_id, "phase": "A", "company_name": "co", "project_name": "P1",
+           "order_amount_net": 1.2, "contract_start_date": date(2024, 5, 1), "contract_end_date": date(2025, 4, 30),
+           "billing_method": 1, "high_potential_mark": False}
+    assert index.crm_contract_aggregate(row, 1)["error"] is error